@@ -10,6 +10,10 @@ from diff_sim.nn.base_nn import Network
 
 model_path = os.path.join(os.path.dirname(__file__), '../xmls/cartpole.xml')
 
+_Q = jnp.array([0., 0., 0., 0])
+_QF = jnp.array([25, 100, 0.25, 1])
+_R = jnp.array([0.001])
+
 
 class Policy(Network):
     layers: list
@@ -42,25 +46,23 @@ def policy(net: Network, mx: mjx.Model, dx: mjx.Data, key: jnp.ndarray
 def run_cost(mx: mjx.Model,dx:mjx.Data) -> jnp.ndarray:
     # x^T Q x
     x = state_encoder(mx,dx)
-    return  jnp.dot(x.T, jnp.dot(jnp.diag(jnp.array([0., 0., 0., 0])), x))
+    return jnp.sum(jnp.square(x) * _Q)
 
 def terminal_cost(mx: mjx.Model,dx:mjx.Data) -> jnp.ndarray:
     # x^T Q_f x
     x = state_encoder(mx,dx)
-    return 10*jnp.dot(x.T, jnp.dot(jnp.diag(jnp.array([25, 100, 0.25, 1])), x))
+    return 10*jnp.sum(jnp.square(x) * _QF)
 
 def control_cost(mx: mjx.Model,dx:mjx.Data) -> jnp.ndarray:
     # u^T R u
     x = dx.ctrl
-    return jnp.dot(x.T, jnp.dot(jnp.diag(jnp.array([0.001])), x))
+    return jnp.sum(jnp.square(x) * _R)
 
 def init_gen(total_batch: int, key: jnp.ndarray) -> jnp.ndarray:
-    xinits = jnp.concatenate([
-        jax.random.uniform(key, (total_batch, 1), minval=-0.3, maxval=0.3),
-        jax.random.uniform(key, (total_batch, 1), minval=jnp.pi+0.3, maxval=jnp.pi-0.3),
-        jax.random.uniform(key, (total_batch, 1), minval=-0.1, maxval=0.1),
-        jax.random.uniform(key, (total_batch, 1), minval=-0.1, maxval=0.1)
-    ], axis=1).squeeze()
+    # one draw with per-column bounds (cart pos, pole angle, cart vel, pole vel)
+    minval = jnp.array([-0.3, jnp.pi+0.3, -0.1, -0.1])
+    maxval = jnp.array([0.3, jnp.pi-0.3, 0.1, 0.1])
+    xinits = jax.random.uniform(key, (total_batch, 4), minval=minval, maxval=maxval).squeeze()
     return xinits
 
 
@@ -28,6 +28,9 @@ _cfg = Config(
     gen_model=gen_model,
 )
 
+_Q = jnp.array([10, 0.01])
+_R = jnp.array([0.01])
+
 class Policy(Network):
     layers: list
     act: callable
@@ -68,24 +71,23 @@ def policy(net: Network, mx: mjx.Model, dx: mjx.Data, policy_key: jnp.ndarray
 def run_cost(mx: mjx.Model,dx:mjx.Data) -> jnp.ndarray:
     # x^T Q x
     x = state_encoder(mx,dx)
-    return jnp.dot(x.T, jnp.dot(jnp.diag(jnp.array([10, 0.01])), x)) * 100
+    return jnp.sum(jnp.square(x) * _Q) * 100
 
 def terminal_cost(mx: mjx.Model,dx:mjx.Data) -> jnp.ndarray:
     # x^T Q_f x
     x = state_encoder(mx,dx)
-    return jnp.dot(x.T, jnp.dot(jnp.diag(jnp.array([10, 0.01])), x)) * 0.0005
+    return jnp.sum(jnp.square(x) * _Q) * 0.0005
 
 def control_cost(mx: mjx.Model,dx:mjx.Data) -> jnp.ndarray:
     # u^T R u
     x = dx.ctrl
-    return jnp.dot(x.T, jnp.dot(jnp.diag(jnp.array([0.01])), x))
+    return jnp.sum(jnp.square(x) * _R)
 
 def init_gen(total_batch: int, key: jnp.ndarray) -> jnp.ndarray:
-    xinits = jnp.concatenate([
-        jax.random.uniform(key, (total_batch, 1), minval=-1, maxval=1),
-        jax.random.uniform(key, (total_batch, 1), minval=-.7, maxval=.7)
-    ], axis=1)
-
+    # one draw with per-column bounds (pos, vel)
+    xinits = jax.random.uniform(
+        key, (total_batch, 2), minval=jnp.array([-1, -.7]), maxval=jnp.array([1, .7])
+    )
     return xinits
 
 def state_encoder(mx: mjx.Model, dx: mjx.Data) -> jnp.ndarray:
@@ -99,8 +101,9 @@ def gen_network(seed: int) -> Network:
     return Policy([2, 64, 64, 1], key)
 
 def is_terminal(mx: mjx.Model, dx: mjx.Data) -> jnp.ndarray:
-    return jnp.logical_or(jnp.array([(dx.time / mx.opt.timestep) > (_cfg.ntotal - 1)]),
-                          jnp.array([jnp.abs(dx.qpos[0]) > .5]))
+    time_limit = (dx.time / mx.opt.timestep) > (_cfg.ntotal - 1)
+    out_of_bounds = jnp.abs(dx.qpos[0]) > .5
+    return (time_limit | out_of_bounds).reshape(1)
 
 
 ctx = Context(
@@ -14,7 +14,7 @@ from diff_sim.nn.base_nn import Network
 
 @partial(jax.tree_util.register_dataclass,
          data_fields=['mx'],
-         meta_fields=['lr', 'num_gpu', 'seed', 'nsteps', 'ntotal', 'epochs', 'batch', 'samples', 'eval', 'dt', "gen_model"])
+         meta_fields=['lr', 'num_gpu', 'seed', 'nsteps', 'ntotal', 'epochs', 'batch', 'samples', 'eval', 'dt', 'gen_model', 'map_batch', 'remat'])
 @dataclass(frozen=True)
 class Config:
     lr: float     # learning rate
@@ -29,6 +29,8 @@ class Config:
     dt: float     # simulation time step
     mx: mjx.Model # MJX model
     gen_model: Callable[[], mujoco.MjModel]  # Genereate Mujoco MjModel
+    map_batch: int | None = None  # rollouts simulated together per lax.map chunk (None vmaps the whole batch)
+    remat: bool = False  # recompute mjx.step in the backward pass instead of storing its intermediates
 
 class Callbacks:
     def __init__(
@@ -54,7 +56,8 @@ class Callbacks:
         self.controller = controller       # controller function that is called at each time step
         self.loss_func = loss_func         # loss function for the over all learning problem
         self.is_terminal = is_terminal     # terminal condition for the episode
-        self._validate_callbacks()         # type check the callbacks
+        if __debug__:
+            self._validate_callbacks()     # type check the callbacks (skipped under python -O)
 
 
     def _validate_callbacks(self):
@@ -110,7 +113,10 @@ class Context:
     def __init__(self, cfg: Config, cbs: Callbacks):
         self.cfg = cfg
         self.cbs = cbs
-        assert jnp.isclose(cfg.dt, cfg.mx.opt.timestep, atol=1e-6)
+        # timestep of the host MjModel, same tolerance as jnp.isclose(atol=1e-6)
+        timestep = cfg.gen_model().opt.timestep
+        assert abs(cfg.dt - timestep) <= 1e-6 + 1e-5 * abs(timestep)
         assert cfg.num_gpu <= jax.device_count()
         assert (cfg.batch * cfg.samples) % cfg.num_gpu == 0
+        assert cfg.map_batch is None or cfg.map_batch > 0
 
@@ -38,6 +38,8 @@ _cfg = Config(
         gen_model=gen_model,
     )
 
+_R = jnp.full((24,), 10.)
+
 class Policy(Network):
     layers: list
     act: callable
@@ -139,7 +141,7 @@ def control_cost(mx: mjx.Model,dx:mjx.Data) -> jnp.ndarray:
     of actuator_force instead.
     """
     x = dx.actuator_force
-    return jnp.dot(x.T, jnp.dot(jnp.diag(jnp.full((24,), 10.)), x))
+    return jnp.sum(jnp.square(x) * _R)
 
 
 def init_gen(total_batch: int, key: jnp.ndarray) -> jnp.ndarray:
@@ -193,7 +195,7 @@ def gen_network(seed: int) -> Network:
 
 def is_terminal(mx: mjx.Model, dx: mjx.Data) -> jnp.ndarray:
     pos = parse_sensordata("object_position", mx, dx)
-    return  jnp.array([jnp.logical_or(pos[2] < -0.05, (dx.time / mx.opt.timestep) > (_cfg.ntotal-1))])
+    return ((pos[2] < -0.05) | ((dx.time / mx.opt.timestep) > (_cfg.ntotal-1))).reshape(1)
 
 # TODO mx should not be needed in this context this means make step should be modified
 ctx = Context(
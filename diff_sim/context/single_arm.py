@@ -28,6 +28,9 @@ _cfg = Config(
     gen_model=gen_model
 )
 
+_RUN_W = jnp.array([0, 0, 0, 10, 10, 0.1, 0.1, 0.1, 0.1, 0.1])
+_CTRL_W = jnp.array([0.1, 0.1, 0.1])
+
 class Policy(Network):
     layers: list
     act: callable
@@ -65,42 +68,35 @@ def state_decoder(x: jnp.ndarray) -> jnp.ndarray:
     return x
 
 def control_cost(mx: mjx.Model, dx: mjx.Data) -> jnp.ndarray:
-    x = dx.ctrl
-    return jnp.dot(x.T, jnp.dot(jnp.diag(jnp.array([0.1, 0.1, 0.1])), x))
+    return jnp.sum(jnp.square(dx.ctrl) * _CTRL_W)
 
 def run_cost(mx: mjx.Model, dx: mjx.Data) -> jnp.ndarray:
     x = state_encoder(mx, dx)
-    return jnp.dot(x.T, jnp.dot(jnp.diag(jnp.array([0, 0, 0, 10, 10, 0.1, 0.1, 0.1, 0.1, 0.1])), x))
+    return jnp.sum(jnp.square(x) * _RUN_W)
 
 def terminal_cost(mx: mjx.Model, dx: mjx.Data) -> jnp.ndarray:
     x = state_encoder(mx, dx)
-    return 0.01*jnp.dot(x.T, jnp.dot(jnp.diag(jnp.array([0, 0, 0, 10, 10, 0.1, 0.1, 0.1, 0.1, 0.1])), x))
+    return 0.01*jnp.sum(jnp.square(x) * _RUN_W)
 
 def init_gen(total_batch: int, key: jnp.ndarray) -> jnp.ndarray:
-    angs = jax.random.uniform(key, (total_batch, 1), minval=-1.57, maxval=1.57)
-    obj_x = jax.random.uniform(key, (total_batch, 1), minval=-.15, maxval=0.73)
-    obj_y = jax.random.uniform(key, (total_batch, 1), minval=0, maxval=0.1)
-    qpos = jnp.concatenate([angs, obj_x, obj_y], axis=1)
-    qvel = jax.random.uniform(key, (total_batch, _cfg.mx.nv), minval=-0.1, maxval=0.1)
-    return jnp.concatenate([qpos, qvel], axis=1)
+    # one draw with per-column bounds: arm angle, object x, object y, then qvel
+    nv = _cfg.mx.nv
+    minval = jnp.concatenate([jnp.array([-1.57, -.15, 0]), jnp.full((nv,), -0.1)])
+    maxval = jnp.concatenate([jnp.array([1.57, 0.73, 0.1]), jnp.full((nv,), 0.1)])
+    return jax.random.uniform(key, (total_batch, 3 + nv), minval=minval, maxval=maxval)
 
 def gen_network(seed: int) -> Network:
     key = jax.random.PRNGKey(seed)
     return Policy([_cfg.mx.nq + _cfg.mx.nv, 64, 64, _cfg.mx.nu], key)
 
 def is_terminal(mx: mjx.Model, dx: mjx.Data) -> jnp.ndarray:
-    time_limit =  (dx.time/ mx.opt.timestep) > (_cfg.ntotal - 1)
-    # check if angles are going too far e.g. multiple rotations
-    qpos = dx.qpos
-    qpos = jnp.abs(qpos) > 2.2*jnp.pi
-    qpos = jnp.sum(qpos, axis=0) > 0
-    qvel = dx.qvel
-    qvel = jnp.abs(qvel) > 10
-    qvel = jnp.sum(qvel, axis=0) > 0
-    # check if a pos is nan
-    nan_check = jnp.isnan(dx.qpos)
-    nan_check = jnp.sum(nan_check, axis=0) > 0
-    return jnp.array([jnp.logical_or(jnp.logical_or(time_limit, qpos), jnp.logical_or(qvel, nan_check))])
+    flags = jnp.stack([
+        (dx.time / mx.opt.timestep) > (_cfg.ntotal - 1),  # time limit
+        jnp.any(jnp.abs(dx.qpos) > 2.2*jnp.pi),           # angles going too far e.g. multiple rotations
+        jnp.any(jnp.abs(dx.qvel) > 10),                   # velocities blowing up
+        jnp.any(jnp.isnan(dx.qpos)),                      # a pos is nan
+    ])
+    return jnp.any(flags, keepdims=True)
 
 ctx = Context(
     _cfg,
@@ -71,25 +71,15 @@ def loss_fn_td_det(params: PyTree, static: PyTree, x_init: jnp.ndarray, ctx: Con
             We compute the temporal difference loss over the entire trajectory and average it over the batch
             loss = 1/B * sum_{b=1}^{B} sum_{t=1}^{T} (v(x_{b,t}) - v(x_{b,t+1}) - c(x_{b,t}, u_{b,t}))^2
     """
-    @jax.vmap
-    def v_diff(x,t):
-        v_seq = jax.vmap(model)(x, t)
-        v0, v1 = v_seq[0:-1], v_seq[1:]
-        return v0 - v1, v_seq[-1]
-
-    @jax.vmap
-    def td_cost(diff, term, cost):
-        v_diff_cost = diff - cost[:-1]
-        v_term_cost = term - cost[-1]
-        return jnp.sum(jnp.square(v_diff_cost)) + jnp.square(v_term_cost)
-    
     model = eqx.combine(params, static)
-    dxs, x, _, costs, t, terminated = controlled_simulate(x_init, ctx, model, user_key)
+    dxs, x, _, costs, t, terminated = controlled_simulate(x_init, ctx, model, user_key, ctx.cfg.nsteps)
     B, T, _ = x.shape
-    diff, term = v_diff(x,t)
+    v = jax.vmap(jax.vmap(model))(x, t).reshape(B, T)
     traj_costs = jnp.mean(jnp.sum(costs, axis=-1))
-    costs = td_cost(diff.reshape(B, T-1), term.reshape(B, 1), costs)
-    return jnp.mean(costs), traj_costs
+    # TD residuals over the (B, T) block
+    diff = v[:, :-1] - v[:, 1:]
+    costs = jnp.sum(jnp.square(diff - costs[:, :-1]), axis=-1) + jnp.square(v[:, -1] - costs[:, -1])
+    return jnp.mean(costs), (traj_costs, dxs, terminated)
 
 
 def loss_fn_td_stoch(params: PyTree, static: PyTree, x_init: jnp.ndarray, ctx: Context, user_key: jnp.ndarray) -> tuple[jnp.ndarray, jnp.ndarray]:
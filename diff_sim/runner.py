@@ -1,4 +1,6 @@
+import os
 import argparse
+import dataclasses
 import wandb
 import mujoco
 from mujoco import viewer
@@ -9,12 +11,16 @@ import jax
 import jax.numpy as jnp
 import contextlib  # Added for handling headless mode
 from diff_sim.context.tasks import ctxs
+from diff_sim.context.meta_context import Context
 from diff_sim.utils.tqdm import trange
 from diff_sim.utils.mj import visualise_policy
 from diff_sim.utils.generic import save_model
 from diff_sim.utils.mj_data_manager import create_data_manager
 
 config.update('jax_default_matmul_precision', 'high')
+# Persistent compilation cache
+config.update('jax_compilation_cache_dir', os.environ.get('JAX_COMPILATION_CACHE_DIR', os.path.expanduser('~/.cache/jax')))
+config.update('jax_persistent_cache_min_entry_size_bytes', -1)
 
 if __name__ == '__main__':
     try:
@@ -26,8 +32,19 @@ if __name__ == '__main__':
             "--gpu_id", type=int, default=0,
             help="Use jax.devices() and nvidia-smi to select the least busy GPU"
         )
+        parser.add_argument("--batch", type=int, default=None, help="Override the task batch size (parallel simulations)")
+        parser.add_argument("--nsteps", type=int, default=None, help="Override the task mini-episode length")
         args = parser.parse_args()
         ctx = ctxs[args.task]
+        if args.batch is not None and args.batch <= 0:
+            parser.error("--batch must be positive")
+        if args.batch is not None and (args.batch * ctx.cfg.samples) % ctx.cfg.num_gpu != 0:
+            parser.error(f"--batch times samples ({ctx.cfg.samples}) must divide by num_gpu ({ctx.cfg.num_gpu})")
+        if args.nsteps is not None and not 1 < args.nsteps <= ctx.cfg.ntotal:
+            parser.error(f"--nsteps must be in [2, {ctx.cfg.ntotal}] (one step rolls out nothing)")
+        overrides = {k: v for k, v in (("batch", args.batch), ("nsteps", args.nsteps)) if v is not None}
+        if overrides:
+            ctx = Context(dataclasses.replace(ctx.cfg, **overrides), ctx.cbs)
 
         # Initialize wandb
         wandb.init(anonymous="allow", mode='offline') if args.wb_project is None else (
@@ -48,7 +65,6 @@ if __name__ == '__main__':
         with (jax.default_device(jax.devices()[args.gpu_id])), viewer_context as viewer:
             net, optim = ctx.cbs.gen_network(ctx.cfg.seed), optax.adamw(ctx.cfg.lr)
             opt_state = optim.init(eqx.filter(net, eqx.is_array))
-            make_step = net.make_step_multi_gpu if ctx.cfg.num_gpu > 1 else net.make_step
 
             # Run through the epochs and log the loss
             # make_data that give batch of dx
@@ -59,14 +75,15 @@ if __name__ == '__main__':
             # init data
             for e in (es := trange(ctx.cfg.epochs)):
                 key, xkey, tkey, user_key = jax.random.split(key, num = 4)
-                net, opt_state, loss_value, res = make_step(dxs, optim, net, opt_state, ctx, user_key)
+                net, opt_state, loss_value, res = net.make_step(dxs, optim, net, opt_state, ctx, user_key)
                 traj_cost, dxs, terminated = res
                 dxs = data_manager.reset_data(ctx.cfg.mx, dxs, ctx, tkey, terminated)
-                sum_loss += loss_value.item()
-                sum_cost += traj_cost.item()
-                sum_reset += jnp.sum(terminated).item()
+                # accumulated on device, read back when logging
+                sum_loss += loss_value
+                sum_cost += traj_cost
+                sum_reset += jnp.sum(terminated)
                 if e % iter == 0:
-                    log_data = {"Loss avg": round(sum_loss/iter, 3), "Traj Cost avg": round(sum_cost/iter, 3), "nreset avg": sum_reset}
+                    log_data = {"Loss avg": round(float(sum_loss)/iter, 3), "Traj Cost avg": round(float(sum_cost)/iter, 3), "nreset avg": int(sum_reset)}
                     wandb.log(log_data)
                     es.set_postfix(log_data)
                     sum_loss, sum_cost, sum_reset = 0, 0, 0
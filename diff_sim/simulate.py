@@ -1,5 +1,8 @@
 import jax
 import jax.numpy as jnp
+import numpy as np
+from jax.experimental.shard_map import shard_map
+from jax.sharding import Mesh, PartitionSpec as P
 from mujoco import mjx
 import equinox as eqx
 from diff_sim.context.meta_context import Context
@@ -7,49 +10,64 @@ from diff_sim.nn.base_nn import Network
 
 @eqx.filter_jit
 def controlled_simulate(dxs:mjx.Data, ctx: Context, net: Network, key: jnp.ndarray, ntime: int):
-    mx = ctx.cfg.mx
+    # with remat only each step's input Data is kept for the backward pass, the step internals are recomputed
+    dynamics = jax.checkpoint(mjx.step, prevent_cse=False) if ctx.cfg.remat else mjx.step
 
     def cost_fn(mx:mjx.Model , dx:mjx.Data):
         ucost = ctx.cbs.control_cost(mx,dx) * ctx.cfg.dt
         xcst = ctx.cbs.run_cost(mx,dx) * ctx.cfg.dt
-        return jnp.array([ucost + xcst])
+        return ucost + xcst
 
-    # TODO: append a flag with x that signifies wether you should terminate or not
-    def step(carry, _):
-        dx, key = carry
-        key, subkey = jax.random.split(key)
-        dx, u = ctx.cbs.controller(net, mx, dx, subkey)
-        cost = cost_fn(mx, dx)
-        dx = mjx.step(mx, dx) # Dynamics function
-        terminated = ctx.cbs.is_terminal(mx, dx)
-        x = ctx.cbs.state_encoder(mx,dx)
-        t = jnp.expand_dims(dx.time, axis=0)
-        return (dx, key), jnp.concatenate([x, dx.ctrl, cost, t, terminated], axis=0)
+    def simulate_batch(mx: mjx.Model, net: Network, dxs: mjx.Data, keys: jnp.ndarray):
+        def step(carry, subkey):
+            dx, done = carry
+            dx, u = ctx.cbs.controller(net, mx, dx, subkey)
+            # mask the gradients of the costs that are after the termination
+            cost = cost_fn(mx, dx) * jnp.logical_not(done)
+            dx = dynamics(mx, dx) # Dynamics function
+            # done stays set from the first terminal state onward
+            done = jnp.logical_or(done, jnp.any(ctx.cbs.is_terminal(mx, dx)))
+            x = ctx.cbs.state_encoder(mx,dx)
+            return (dx, done), (x, dx.ctrl, cost, dx.time)
 
-    @jax.vmap
-    def rollout(dx):
-        x_init = ctx.cbs.state_encoder(mx,dx)
-        (dx,_), res = jax.lax.scan(step, (dx, key), None, length=ntime-1)
-        x, u, costs, ts, terminated = res[...,:-mx.nu-3], res[...,-mx.nu-3:-3], res[...,-3], res[...,-2], res[...,-1]
-        x = jnp.concatenate([x_init.reshape(1,-1), x], axis=0)
-        t = jnp.concatenate([jnp.array([ctx.cfg.dt]), ts], axis=0)
-        # If the last time step is equal to the total time steps, then it is a terminal state
-        # else it is not a terminal state. Compute the costs accordingly
-        # If the last time step is equal to the total time steps, then it is a terminal state
-        # else it is not a terminal state. Compute the costs accordingly
-        is_terminal = jnp.isclose((ts[-1] / mx.opt.timestep), (ctx.cfg.ntotal - 1))
-        def t_cost(): return ctx.cbs.terminal_cost(mx, dx);
-        def r_cost(): return ctx.cbs.run_cost(mx, dx) * ctx.cfg.dt;
-        term_cost = jax.lax.cond(is_terminal, t_cost, r_cost)
-        
-        zeros = jnp.zeros_like(term_cost)
-        costs = jnp.concatenate([costs, zeros.reshape(-1)], axis=0)
-        termination_mask = jnp.concatenate([
-            jnp.array([False]),  # Ignore the first cost
-            jnp.cumsum(terminated) > 0  # True from first termination onward
-        ], axis=0)
-        # mask the gradients of the costs that are after the termination
-        costs = costs * jnp.logical_not(termination_mask)       
-        return dx, x, u, costs, t, jnp.any(termination_mask)
+        def rollout(dx, keys):
+            x_init = ctx.cbs.state_encoder(mx,dx)
+            (dx,done), (x, u, costs, ts) = jax.lax.scan(step, (dx, jnp.array(False)), keys)
+            x = jnp.concatenate([x_init.reshape(1,-1), x], axis=0)
+            t = jnp.concatenate([jnp.array([ctx.cfg.dt]), ts], axis=0)
+            # The final state is not charged within the mini-episode, its cost slot is a constant zero
+            costs = jnp.pad(costs, (0, 1))
+            return dx, x, u, costs, t, done
 
-    return rollout(dxs)
+        B = keys.shape[0]
+        if ctx.cfg.map_batch is None or ctx.cfg.map_batch >= B:
+            return jax.vmap(rollout)(dxs, keys)
+        # simulate the batch in sequential chunks of map_batch vmapped rollouts, any remainder is vmapped on its own.
+        # mjx.Data has zero size leaves, so the chunks are reshaped with explicit sizes rather than lax.map's batch_size
+        k = ctx.cfg.map_batch
+        n = B // k * k
+        chunks = jax.tree_util.tree_map(lambda x: x[:n].reshape(n // k, k, *x.shape[1:]), (dxs, keys))
+        out = jax.lax.map(lambda args: jax.vmap(rollout)(*args), chunks)
+        out = jax.tree_util.tree_map(lambda x: x.reshape(n, *x.shape[2:]), out)
+        if n == B:
+            return out
+        rest = jax.vmap(rollout)(*jax.tree_util.tree_map(lambda x: x[n:], (dxs, keys)))
+        return jax.tree_util.tree_map(lambda a, b: jnp.concatenate([a, b]), out, rest)
+
+    # independent step keys for every rollout, fed to the scan as inputs
+    keys = jax.random.split(key, (dxs.time.shape[0], ntime-1))
+    # batches that do not split evenly stay on the default device
+    if ctx.cfg.num_gpu == 1 or dxs.time.shape[0] % ctx.cfg.num_gpu != 0:
+        return simulate_batch(ctx.cfg.mx, net, dxs, keys)
+
+    # shard the batch over num_gpu devices starting at the default one (--gpu_id), model and network replicated
+    devices = jax.devices()
+    start = devices.index(jax.config.jax_default_device) if jax.config.jax_default_device in devices else 0
+    devices = (devices[start:] + devices[:start])[:ctx.cfg.num_gpu]
+    params, static = eqx.partition(net, eqx.is_array)
+    mesh = Mesh(np.array(devices), ('batch',))
+    sharded = shard_map(
+        lambda mx, params, dxs, keys: simulate_batch(mx, eqx.combine(params, static), dxs, keys),
+        mesh=mesh, in_specs=(P(), P(), P('batch'), P('batch')), out_specs=P('batch'), check_rep=False
+    )
+    return sharded(ctx.cfg.mx, params, dxs, keys)
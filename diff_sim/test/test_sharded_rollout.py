@@ -0,0 +1,57 @@
+import os
+import sys
+import subprocess
+import dataclasses
+import jax
+import numpy as np
+import equinox as eqx
+from diff_sim.context.di import ctx as di_ctx
+from diff_sim.context.meta_context import Context
+from diff_sim.loss_funcs import loss_fn_policy_det
+from diff_sim.utils.mj_data_manager import create_data_manager
+
+
+def loss_and_grads(ctx: Context, dxs, net, key):
+    params, static = eqx.partition(net, eqx.is_array)
+    (loss, _), grads = eqx.filter_jit(jax.value_and_grad(loss_fn_policy_det, has_aux=True))(
+        params, static, dxs, ctx, key
+    )
+    return loss, grads
+
+
+def compare_sharded_to_single_device():
+    assert jax.device_count() >= 2
+    single = Context(dataclasses.replace(di_ctx.cfg, num_gpu=1), di_ctx.cbs)
+    sharded = Context(dataclasses.replace(di_ctx.cfg, num_gpu=2), di_ctx.cbs)
+
+    init_key, user_key = jax.random.split(jax.random.PRNGKey(0))
+    dxs = create_data_manager().create_data(single.cfg.mx, single, single.cfg.batch, init_key)
+    net = single.cbs.gen_network(single.cfg.seed)
+
+    loss_1, grads_1 = loss_and_grads(single, dxs, net, user_key)
+    loss_2, grads_2 = loss_and_grads(sharded, dxs, net, user_key)
+
+    np.testing.assert_allclose(loss_1, loss_2, rtol=1e-5, atol=1e-6)
+    jax.tree_util.tree_map(
+        lambda a, b: np.testing.assert_allclose(a, b, rtol=1e-4, atol=1e-6), grads_1, grads_2
+    )
+
+
+def test_sharded_matches_single_device():
+    """ The sharded rollout (num_gpu=2) must give the same loss and gradients as the single device one. """
+    # The fake CPU devices only take effect before jax initialises, so the comparison runs in a fresh process
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(
+        os.environ,
+        XLA_FLAGS=os.environ.get("XLA_FLAGS", "") + " --xla_force_host_platform_device_count=2",
+        PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])),
+    )
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--compare"], env=env, check=True)
+
+
+if __name__ == "__main__":
+    if "--compare" in sys.argv:
+        compare_sharded_to_single_device()
+    else:
+        test_sharded_matches_single_device()
+        print("sharded rollout matches single device")
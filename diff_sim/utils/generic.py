@@ -1,20 +1,28 @@
 import time
+import threading
 import equinox as eqx
+import jax
 import os
 
-def save_model(net: eqx.Module, directory: str, task_name: str):
+def save_model(net: eqx.Module, directory: str, task_name: str) -> threading.Thread:
     """
     Save the model to the disk with filename as task_name + current time under the models directory.
     :param directory: directory to save the model
     :param net: Equinox module
     :param task_name: task name
 
-    :return: None
+    :return: the thread writing the checkpoint, join it to wait for the write to finish
 
     Note: to load the model, use eqx.tree_deserialise_leaves
+    Note: the parameters are copied to host before returning, so the caller is free to update or donate net
 
     """
     directory = "models" + "/" + directory
     os.makedirs(directory, exist_ok=True)
     date_name = task_name + "_" + time.strftime("%Y%m%d-%H%M%S")
-    eqx.tree_serialise_leaves(f"./{directory}/{date_name}.eqx", net)
+    host_net = jax.device_get(net)
+    writer = threading.Thread(
+        target=eqx.tree_serialise_leaves, args=(f"./{directory}/{date_name}.eqx", host_net)
+    )
+    writer.start()
+    return writer
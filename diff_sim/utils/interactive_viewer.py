@@ -1,6 +1,8 @@
+import time
+import jax
 import mujoco
 import numpy
-from mujoco import viewer, mj_step
+from mujoco import viewer, mj_step, mjx
 
 
 def interactive_viewer(xml_path: str):
@@ -12,8 +14,44 @@ def interactive_viewer(xml_path: str):
             mujoco.mj_step(model, data)
             v.sync()
 
+def playback_viewer(xml_path: str, chunk: int = 100):
+    """
+    Non-interactive playback: physics runs on device with MJX and the viewer only displays the frames,
+    so perturbations and control sliders in the viewer have no effect.
+    """
+    model = mujoco.MjModel.from_xml_path(xml_path)
+    data = mujoco.MjData(model)
+    mx = mjx.put_model(model)
+
+    @jax.jit
+    def simulate_chunk(dx):
+        # advance `chunk` steps on device in one call, returning the last state and the qpos of every frame
+        def step(dx, _):
+            dx = mjx.step(mx, dx)
+            return dx, dx.qpos
+        return jax.lax.scan(step, dx, None, length=chunk)
+
+    dx, qpos = simulate_chunk(jax.jit(mjx.make_data)(mx))
+    with mujoco.viewer.launch_passive(model, data) as v:
+        while v.is_running():
+            frames = numpy.asarray(qpos)
+            # dispatch is asynchronous, so the next chunk is simulated while this one is played back
+            dx, qpos = simulate_chunk(dx)
+            for q in frames:
+                if not v.is_running():
+                    break
+                step_start = time.time()
+                data.qpos[:] = q
+                mujoco.mj_forward(model, data)
+                v.sync()
+                time_until_next_step = model.opt.timestep - (time.time() - step_start)
+                if time_until_next_step > 0:
+                    time.sleep(time_until_next_step)
+
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--xml", help="path to the xml file", default="doubleintegrator.xml")
-    interactive_viewer(parser.parse_args().xml)
\ No newline at end of file
+    parser.add_argument("--playback", action="store_true", help="Play back an MJX rollout instead of the interactive viewer")
+    args = parser.parse_args()
+    playback_viewer(args.xml) if args.playback else interactive_viewer(args.xml)
@@ -4,19 +4,30 @@ import mujoco
 import mujoco.mjx as mjx
 import mujoco.viewer
 import jax
+import jax.numpy as jnp
 from diff_sim.context.meta_context import Context
 from diff_sim.simulate import controlled_simulate
 from diff_sim.nn.base_nn import Network
 import equinox as eqx
 
-def set_init(x, mx):
+def set_init(x_inits, mx):
     dx = mjx.make_data(mx)
-    # TODO: Decode x_init here.
-    qpos = dx.qpos.at[:].set(x[:mx.nq])
-    qvel = dx.qvel.at[:].set(x[mx.nq:])
-    dx = dx.replace(qpos=qpos, qvel=qvel)
-    return mjx.step(mx, dx)
-set_init_vmap = jax.jit(jax.vmap(set_init,in_axes=(0, None)))
+
+    def init_one(x):
+        # TODO: Decode x_init here.
+        qpos = dx.qpos.at[:].set(x[:mx.nq])
+        qvel = dx.qvel.at[:].set(x[mx.nq:])
+        return mjx.step(mx, dx.replace(qpos=qpos, qvel=qvel))
+
+    return jax.vmap(init_one)(x_inits)
+
+
+@eqx.filter_jit
+def simulate_policy(x_inits: jnp.ndarray, ctx: Context, net: Network, key: jnp.ndarray, ntime: int) -> jnp.ndarray:
+    # initialise, roll out and decode under one jit
+    dxs = set_init(x_inits, ctx.cfg.mx)
+    _, x, _, _, _, _ = controlled_simulate(dxs, ctx, net, key, ntime)
+    return jax.vmap(jax.vmap(ctx.cbs.state_decoder))(x)
 
 
 # TODO pass the 2 dxs for the simulation and create themn in runner. 
@@ -26,17 +37,15 @@ def visualise_policy(
 ):
     key, xkey, tkey, user_key = jax.random.split(key, num=4)
     x_inits = ctx.cbs.init_gen(2, xkey)
-    dxs = set_init_vmap(x_inits, ctx.cfg.mx)
-    _, x, _, _, _, term_mask = eqx.filter_jit(controlled_simulate)(dxs, ctx, net, tkey, 600)
-    x = jax.vmap(jax.vmap(ctx.cbs.state_decoder))(x)
-    x = np.array(x.squeeze())
+    x = simulate_policy(x_inits, ctx, net, tkey, 600)
+    # split into contiguous qpos/qvel blocks
+    x = np.asarray(x)
+    qpos, qvel = np.ascontiguousarray(x[..., :m.nq]), np.ascontiguousarray(x[..., m.nq:])
     for b in range(x.shape[0]):
         for i in range(x.shape[1]):
             step_start = time.time()
-            qpos = x[b, i, :m.nq]
-            qvel = x[b, i, m.nq:]
-            d.qpos[:] = qpos
-            d.qvel[:] = qvel
+            d.qpos[:] = qpos[b, i]
+            d.qvel[:] = qvel[b, i]
             mujoco.mj_forward(m, d)
             viewer.sync()
             time_until_next_step = m.opt.timestep - (time.time() - step_start)
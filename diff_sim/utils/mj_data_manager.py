@@ -5,14 +5,15 @@ import equinox as eqx
 import jax
 import jax.numpy as jnp
 from diff_sim.context.meta_context import Context
+from diff_sim.utils.mj import set_init
 
 class DataManager(eqx.Module):
     _set_init_compiled: Callable[[jnp.ndarray, mjx.Model], mjx.Data] = field(default=None)
-    _replace_indices_compiled: Callable[[mjx.Data, jnp.ndarray, mjx.Data], mjx.Data] = field(default=None)
+    _replace_masked_compiled: Callable[[mjx.Data, jnp.ndarray, mjx.Data], mjx.Data] = field(default=None)
 
-    def __init__(self, set_init, replace_indices):
+    def __init__(self, set_init, replace_masked):
         self._set_init_compiled = set_init
-        self._replace_indices_compiled = replace_indices
+        self._replace_masked_compiled = replace_masked
 
     def create_data(
             self, mx: mjx.Model, ctx: Context, batch: int, key: jnp.ndarray
@@ -24,27 +25,19 @@ class DataManager(eqx.Module):
     def reset_data(
             self, mx: mjx.Model, dxs: mjx.Data, ctx: Context, key: jnp.ndarray, terminated: jnp.ndarray
     ) -> Tuple[mjx.Data, jnp.ndarray]:
-        indices_to_reset = jnp.where(terminated)[0]
-        if indices_to_reset.size > 0:
-            new_dxs = self.create_data(mx, ctx, indices_to_reset.size, key)
-            dxs = self._replace_indices_compiled(dxs, indices_to_reset, new_dxs)
-        return dxs
+        # replace the terminated rollouts with a masked select over a fresh batch
+        new_dxs = self.create_data(mx, ctx, terminated.shape[0], key)
+        return self._replace_masked_compiled(dxs, terminated, new_dxs)
 
 
 def create_data_manager() -> DataManager:
-    def set_init(x: jnp.ndarray, mx: mjx.Model) -> mjx.Data:
-        dx = mjx.make_data(mx)
-        qpos = dx.qpos.at[:].set(x[:mx.nq])
-        qvel = dx.qvel.at[:].set(x[mx.nq:])
-        dx = dx.replace(qpos=qpos, qvel=qvel)
-        return mjx.step(mx, dx)
-
-    def replace_indices(data: mjx.Data, indices: jnp.ndarray, new_data: mjx.Data) -> mjx.Data:
+    def replace_masked(data: mjx.Data, mask: jnp.ndarray, new_data: mjx.Data) -> mjx.Data:
         def process_field(field, new_field):
-            return field.at[indices].set(new_field)
+            return jnp.where(mask.reshape(mask.shape + (1,) * (field.ndim - 1)), new_field, field)
 
         return jax.tree_util.tree_map(process_field, data, new_data)
 
+    # the batch being reset is donated
     return DataManager(
-        jax.jit(jax.vmap(set_init, in_axes=(0, None))),  jax.jit(replace_indices)
+        jax.jit(set_init),  jax.jit(replace_masked, donate_argnums=(0,))
     )
\ No newline at end of file